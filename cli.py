@@ -5,7 +5,7 @@ import sys
 from datetime import datetime, timedelta
 
 from historical_data_manager import HistoricalDataManager
-from config import KLINE_INTERVALS, MARKET_TYPES, DATA_TYPES
+from config import DEFAULT_CONFIG, KLINE_INTERVALS, MARKET_TYPES, DATA_TYPES
 
 
 def download_command(args):
@@ -94,7 +94,8 @@ def read_command(args):
 
 def info_command(args):
     """信息查询命令"""
-    manager = HistoricalDataManager(args.data_dir)
+    # 存储统计包括脚本共享的解析缓存
+    manager = HistoricalDataManager(args.data_dir, DEFAULT_CONFIG["script_cache_directory"])
     
     if args.symbol:
         # 查询特定交易对信息
@@ -130,6 +131,10 @@ def info_command(args):
         for market_type, market_stats in stats['market_types'].items():
             print(f"{market_type}: {market_stats['file_count']} 文件, {market_stats['size_mb']:.2f} MB")
         
+        if 'cache' in stats:
+            cache_stats = stats['cache']
+            print(f"解析缓存 ({cache_stats['directory']}): {cache_stats['file_count']} 文件, {cache_stats['size_mb']:.2f} MB")
+        
         # 显示本地交易对
         print("\n本地交易对:")
         for market_type in MARKET_TYPES:
@@ -143,7 +148,8 @@ def info_command(args):
 
 def cleanup_command(args):
     """清理数据命令"""
-    manager = HistoricalDataManager(args.data_dir)
+    # 同时清理脚本共享的解析缓存
+    manager = HistoricalDataManager(args.data_dir, DEFAULT_CONFIG["script_cache_directory"])
     
     print(f"清理 {args.days} 天前的数据...")
     
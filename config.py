@@ -1,4 +1,5 @@
 """配置文件"""
+import functools
 import os
 from datetime import datetime
 
@@ -12,6 +13,9 @@ KLINE_INTERVALS = [
     "1s", "1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"
 ]
 
+# 币安公开历史数据的最早日期，向前查找文件时以此为下限
+EARLIEST_DATA_DATE = "2017-01-01"
+
 # 默认配置
 DEFAULT_CONFIG = {
     "data_directory": os.path.join(os.getcwd(), "data"),
@@ -23,10 +27,15 @@ DEFAULT_CONFIG = {
     "symbols": ["BTCUSDT", "ETHUSDT"],
     "download_monthly": True,
     "download_daily": True,
+    "max_concurrent_downloads": 8,
+    "cache_directory": None,  # 解析结果的磁盘缓存目录，None表示不缓存
+    # scripts/中每日脚本共享的解析缓存目录，None表示不缓存
+    "script_cache_directory": os.path.join(os.getcwd(), "data", "cache"),
     "verify_checksum": False
 }
 
 # 文件路径模板
+@functools.lru_cache(maxsize=128)
 def get_market_path_prefix(market_type):
     """获取市场类型的路径前缀"""
     if market_type == "spot":
@@ -2,6 +2,9 @@
 import os
 import requests
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import List, Optional
@@ -17,11 +20,27 @@ from config import (
 class BinanceDataDownloader:
     """币安历史数据下载器"""
     
-    def __init__(self, data_directory: str = None):
+    def __init__(self, data_directory: str = None, max_concurrent_downloads: int = None):
         self.data_directory = data_directory or DEFAULT_CONFIG["data_directory"]
-        self.session = requests.Session()
+        self.max_concurrent_downloads = max_concurrent_downloads or DEFAULT_CONFIG["max_concurrent_downloads"]
+        self.session = self._create_session()
+        # 已创建过的本地目录，避免每个文件都重复调用os.makedirs
+        self._created_dirs = set()
         self._ensure_data_directory()
     
+    def _create_session(self) -> requests.Session:
+        """创建复用连接的HTTP会话，对限流和服务端错误自动重试"""
+        session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504)
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
     def _ensure_data_directory(self):
         """确保数据目录存在"""
         os.makedirs(self.data_directory, exist_ok=True)
@@ -78,30 +97,44 @@ class BinanceDataDownloader:
                 subdir = f"{market_type}/monthly/{data_type}/{symbol}"
         
         local_dir = os.path.join(self.data_directory, subdir)
-        os.makedirs(local_dir, exist_ok=True)
+        if local_dir not in self._created_dirs:
+            os.makedirs(local_dir, exist_ok=True)
+            self._created_dirs.add(local_dir)
         return os.path.join(local_dir, filename)
     
+    def _is_downloaded(self, local_path: str) -> bool:
+        """本地文件是完整的ZIP时视为已下载，无需再发起网络请求
+        
+        币安历史数据文件发布后不会再变化，因此无需向服务器校验；
+        只检查ZIP尾部的中央目录，损坏或截断的文件会被重新下载。
+        """
+        return (os.path.exists(local_path) and os.path.getsize(local_path) > 0
+                and zipfile.is_zipfile(local_path))
+    
     def _download_file(self, url: str, local_path: str) -> bool:
         """下载单个文件"""
+        # 先写入临时文件，下载完成后再重命名，避免中断的下载被当作已下载文件
+        tmp_path = local_path + ".part"
         try:
             response = self.session.get(url, stream=True)
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
             
-            with open(local_path, 'wb') as f:
+            with open(tmp_path, 'wb') as f:
                 with tqdm(total=total_size, unit='B', unit_scale=True, 
                          desc=os.path.basename(local_path)) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
+                    for chunk in response.iter_content(chunk_size=1 << 20):
                         if chunk:
                             f.write(chunk)
                             pbar.update(len(chunk))
             
+            os.replace(tmp_path, local_path)
             return True
         except requests.exceptions.RequestException as e:
             print(f"下载失败 {url}: {e}")
-            if os.path.exists(local_path):
-                os.remove(local_path)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
     
     def download_data(self, symbols: List[str], market_type: str = "spot",
@@ -132,7 +165,8 @@ class BinanceDataDownloader:
         start_dt = datetime.strptime(start_date, "%Y-%m-%d")
         end_dt = datetime.strptime(end_date, "%Y-%m-%d")
         
-        downloaded_files = []
+        # 先列出所有需要的文件 (url, 本地路径)
+        tasks = []
         
         for symbol in symbols:
             print(f"开始下载 {symbol} 数据...")
@@ -143,19 +177,13 @@ class BinanceDataDownloader:
                 while current_dt <= end_dt:
                     url = self._get_file_url(
                         market_type, data_type, symbol, interval,
-                        current_dt.year, current_dt.month, is_daily=True
+                        current_dt.year, current_dt.month, is_daily=False
                     )
                     local_path = self._get_local_file_path(
                         market_type, data_type, symbol, interval,
-                        current_dt.year, current_dt.month, is_daily=True
+                        current_dt.year, current_dt.month, is_daily=False
                     )
-                    
-                    if not os.path.exists(local_path):
-                        if self._download_file(url, local_path):
-                            downloaded_files.append(local_path)
-                    else:
-                        print(f"文件已存在: {os.path.basename(local_path)}")
-                        downloaded_files.append(local_path)
+                    tasks.append((url, local_path))
                     
                     current_dt += relativedelta(months=1)
             
@@ -172,16 +200,31 @@ class BinanceDataDownloader:
                         market_type, data_type, symbol, interval,
                         date=date_str, is_daily=True
                     )
-                    
-                    if not os.path.exists(local_path):
-                        if self._download_file(url, local_path):
-                            downloaded_files.append(local_path)
-                    else:
-                        print(f"文件已存在: {os.path.basename(local_path)}")
-                        downloaded_files.append(local_path)
+                    tasks.append((url, local_path))
                     
                     current_dt += timedelta(days=1)
         
+        # 同一文件只处理一次（如重复的交易对），避免多个线程同时写同一个临时文件
+        tasks = list(dict.fromkeys(tasks))
+        
+        # 本地已存在的文件直接使用，其余文件并发下载
+        pending = []
+        for url, local_path in tasks:
+            if self._is_downloaded(local_path):
+                print(f"文件已存在: {os.path.basename(local_path)}")
+            else:
+                pending.append((url, local_path))
+        
+        failed = set()
+        if pending:
+            max_workers = min(self.max_concurrent_downloads, len(pending))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(lambda task: self._download_file(*task), pending)
+                failed = {local_path for (_, local_path), ok in zip(pending, results) if not ok}
+        
+        # 保持与请求顺序一致
+        downloaded_files = [local_path for _, local_path in tasks if local_path not in failed]
+        
         print(f"下载完成，共下载 {len(downloaded_files)} 个文件")
         return downloaded_files
     
@@ -1,20 +1,26 @@
 """币安历史数据读取器"""
+import hashlib
 import os
+import re
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import List, Optional, Iterator, Tuple
 import glob
 
-from config import DEFAULT_CONFIG, KLINE_INTERVALS
+from config import DEFAULT_CONFIG, EARLIEST_DATA_DATE, KLINE_INTERVALS
 
 
 class BinanceDataReader:
     """币安历史数据读取器"""
     
-    def __init__(self, data_directory: str = None):
+    def __init__(self, data_directory: str = None, cache_directory: str = None):
         self.data_directory = data_directory or DEFAULT_CONFIG["data_directory"]
+        # 解析结果的磁盘缓存目录，为None时不缓存
+        self.cache_directory = cache_directory or DEFAULT_CONFIG["cache_directory"]
         
         # K线数据列名
         self.kline_columns = [
@@ -34,6 +40,26 @@ class BinanceDataReader:
             'agg_trade_id', 'price', 'quantity', 'first_trade_id',
             'last_trade_id', 'transact_time', 'is_buyer_maker', 'is_best_match'
         ]
+        
+        # 各数据类型的列类型，读取时直接按类型解析，跳过pandas的类型推断
+        # 价格和数量使用float64：float32只有约7位有效数字，无法精确表示BTC等高价币种的价格
+        self.kline_dtypes = {
+            'open_time': 'int64', 'open': 'float64', 'high': 'float64',
+            'low': 'float64', 'close': 'float64', 'volume': 'float64',
+            'close_time': 'int64', 'quote_volume': 'float64', 'count': 'int64',
+            'taker_buy_volume': 'float64', 'taker_buy_quote_volume': 'float64'
+        }
+        
+        self.trade_dtypes = {
+            'id': 'int64', 'price': 'float64', 'qty': 'float64', 'quote_qty': 'float64',
+            'time': 'int64', 'is_buyer_maker': 'bool', 'is_best_match': 'bool'
+        }
+        
+        self.agg_trade_dtypes = {
+            'agg_trade_id': 'int64', 'price': 'float64', 'quantity': 'float64',
+            'first_trade_id': 'int64', 'last_trade_id': 'int64', 'transact_time': 'int64',
+            'is_buyer_maker': 'bool', 'is_best_match': 'bool'
+        }
     
     def _find_data_files(self, symbol: str, market_type: str = "spot",
                         data_type: str = "aggTrades", interval: str = "1h",
@@ -117,35 +143,101 @@ class BinanceDataReader:
             
         return sorted(list(set(files)))
     
-    def _read_zip_file(self, file_path: str, data_type: str, market_type: str) -> pd.DataFrame:
-        """读取ZIP文件中的CSV数据"""
+    def _csv_read_kwargs(self, data_type: str, market_type: str,
+                         columns: Optional[List[str]] = None) -> dict:
+        """构建pd.read_csv的公共参数：列名、列类型和需要解析的列"""
+        dtypes = {
+            "klines": self.kline_dtypes,
+            "trades": self.trade_dtypes,
+            "aggTrades": self.agg_trade_dtypes
+        }.get(data_type)
+        read_kwargs = {"usecols": columns, "dtype": dtypes}
+        # 现货文件没有表头，需要指定列名；期货文件自带表头
+        if market_type == "spot":
+            names = {
+                "klines": self.kline_columns,
+                "trades": self.trade_columns,
+                "aggTrades": self.agg_trade_columns
+            }.get(data_type)
+            if names:
+                read_kwargs["names"] = names
+        return read_kwargs
+    
+    def _read_zip_file(self, file_path: str, data_type: str, market_type: str,
+                       nrows: Optional[int] = None,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取ZIP文件中的CSV数据，nrows指定时只解析前nrows行，columns指定时只解析这些列"""
+        if self.cache_directory:
+            return self._read_zip_file_cached(file_path, data_type, market_type, nrows, columns)
+        return self._parse_zip_file(file_path, data_type, market_type, nrows, columns)
+    
+    def _read_zip_file_cached(self, file_path: str, data_type: str, market_type: str,
+                              nrows: Optional[int] = None,
+                              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """带磁盘缓存的读取：缓存比ZIP文件新时直接加载已解析的DataFrame"""
+        key = repr((os.path.abspath(file_path), data_type, market_type, nrows, columns))
+        cache_path = os.path.join(
+            self.cache_directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl'
+        )
+        
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+                return pd.read_pickle(cache_path)
+        except Exception:
+            # 缓存不存在、已损坏或由不兼容的pandas版本写入，都当作未命中重新解析
+            pass
+        
+        df = self._parse_zip_file(file_path, data_type, market_type, nrows, columns)
+        if not df.empty:
+            try:
+                os.makedirs(self.cache_directory, exist_ok=True)
+                # 先写临时文件再重命名，并发读取时不会读到写了一半的缓存
+                tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                df.to_pickle(tmp_path)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"写入缓存失败 {cache_path}: {e}")
+        return df
+    
+    def _parse_zip_file(self, file_path: str, data_type: str, market_type: str,
+                        nrows: Optional[int] = None,
+                        columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """解析ZIP文件中的CSV数据"""
+        read_kwargs = self._csv_read_kwargs(data_type, market_type, columns)
         try:
             with zipfile.ZipFile(file_path, 'r') as zip_ref:
                 csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv')]
                 if not csv_files:
                     return pd.DataFrame()
                 
-                csv_file = csv_files[0]
-                with zip_ref.open(csv_file) as csv_data:
-                    if market_type == "spot":
-                        if data_type == "klines":
-                            df = pd.read_csv(csv_data, names=self.kline_columns)
-                        elif data_type == "trades":
-                            df = pd.read_csv(csv_data, names=self.trade_columns)
-                        elif data_type == "aggTrades":
-                            df = pd.read_csv(csv_data, names=self.agg_trade_columns)
-                    else:
-                        df = pd.read_csv(csv_data)
-                    
-                    return df
+                with zip_ref.open(csv_files[0]) as csv_data:
+                    return pd.read_csv(csv_data, nrows=nrows, **read_kwargs)
         except Exception as e:
             print(f"读取文件失败 {file_path}: {e}")
             return pd.DataFrame()
     
+    def _iter_zip_file(self, file_path: str, data_type: str, market_type: str,
+                       chunk_size: int,
+                       columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """逐块读取ZIP文件中的CSV数据，每块最多chunk_size行，内存占用与文件大小无关"""
+        read_kwargs = self._csv_read_kwargs(data_type, market_type, columns)
+        try:
+            with zipfile.ZipFile(file_path, 'r') as zip_ref:
+                csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv')]
+                if not csv_files:
+                    return
+                
+                with zip_ref.open(csv_files[0]) as csv_data:
+                    with pd.read_csv(csv_data, chunksize=chunk_size, **read_kwargs) as reader:
+                        yield from reader
+        except Exception as e:
+            print(f"读取文件失败 {file_path}: {e}")
+    
     def read_data(self, symbol: str, market_type: str = "spot",
                  data_type: str = "aggTrades", interval: str = "1h",
                  start_date: str = "2025-07-26", end_date: str = None,
-                 chunk_size: Optional[int] = None) -> pd.DataFrame:
+                 chunk_size: Optional[int] = None, nrows: Optional[int] = None,
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
         """读取历史数据
         
         Args:
@@ -156,6 +248,8 @@ class BinanceDataReader:
             start_date: 开始日期 (YYYY-MM-DD)
             end_date: 结束日期 (YYYY-MM-DD)
             chunk_size: 分块大小，如果指定则返回生成器
+            nrows: 最多读取的行数，读够后不再解析后续文件
+            columns: 只读取指定的列，默认读取全部列
             
         Returns:
             DataFrame或生成器
@@ -174,19 +268,163 @@ class BinanceDataReader:
         print(f"找到 {len(files)} 个数据文件")
         
         if chunk_size:
-            return self._read_data_chunks(files, data_type, market_type, chunk_size)
+            return self._read_data_chunks(files, data_type, market_type, chunk_size, columns, nrows)
+        else:
+            return self._read_all_data(files, data_type, market_type, nrows, columns)
+    
+    def read_files(self, files: List[str], market_type: str = "spot",
+                   data_type: str = "aggTrades", nrows: Optional[int] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """直接读取给定的数据文件，不再扫描数据目录
+        
+        适用于刚下载完、已知文件路径的场景（如download_data的返回值）。
+        
+        Args:
+            files: ZIP文件路径列表，按给定顺序读取
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            nrows: 最多读取的行数，读够后不再解析后续文件
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            DataFrame
+        """
+        if not files:
+            return pd.DataFrame()
+        
+        return self._read_all_data(list(files), data_type, market_type, nrows, columns)
+    
+    def read_latest(self, symbol: str, market_type: str = "spot",
+                    data_type: str = "aggTrades", interval: str = "1h",
+                    n: int = 10, end_date: str = None,
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取最新的n条数据
+        
+        从end_date向前按日期倒序读取日度文件，读够n条即停止，
+        不需要扫描整个历史区间。
+        
+        Args:
+            symbol: 交易对
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            interval: K线间隔 (仅对klines有效)
+            n: 返回的行数
+            end_date: 结束日期 (YYYY-MM-DD)，默认今天
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            按时间顺序排列的最新n条数据
+        """
+        if data_type == "klines" and interval not in KLINE_INTERVALS:
+            raise ValueError(f"无效的K线间隔: {interval}")
+        
+        files = self._find_data_files(
+            symbol, market_type, data_type, interval, EARLIEST_DATA_DATE, end_date
+        )
+        
+        dfs = []
+        collected = 0
+        
+        for file_path in reversed(files):
+            print(f"读取文件: {os.path.basename(file_path)}")
+            # 分块扫描文件，只保留末尾n行，避免把整个大文件载入内存
+            tail = pd.DataFrame()
+            for chunk in self._iter_zip_file(file_path, data_type, market_type,
+                                             max(n, 100_000), columns):
+                tail = pd.concat([tail, chunk]).tail(n) if not tail.empty else chunk.tail(n)
+            if not tail.empty:
+                dfs.append(tail)
+                collected += len(tail)
+            if collected >= n:
+                break
+        
+        if not dfs:
+            print(f"未找到 {symbol} 的数据文件")
+            return pd.DataFrame()
+        
+        result = pd.concat(reversed(dfs), ignore_index=True)
+        return result.tail(n).reset_index(drop=True)
+    
+    def read_monthly(self, symbol: str, year_month: str, market_type: str = "spot",
+                     data_type: str = "aggTrades", interval: str = "1h",
+                     nrows: Optional[int] = None,
+                     columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """直接读取某个月的月度文件
+        
+        只打开对应的 SYMBOL-*-YYYY-MM.zip，配合nrows只解析文件开头的若干行，
+        不需要扫描整个月的日度文件。
+        
+        Args:
+            symbol: 交易对
+            year_month: 月份 (YYYY-MM)
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            interval: K线间隔 (仅对klines有效)
+            nrows: 最多读取的行数
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            DataFrame，文件不存在时返回空DataFrame
+        """
+        try:
+            if not re.fullmatch(r"\d{4}-\d{2}", year_month):
+                raise ValueError
+            datetime.strptime(year_month, "%Y-%m")
+        except (TypeError, ValueError):
+            raise ValueError(f"无效的月份: {year_month}，格式应为 YYYY-MM") from None
+        
+        if data_type == "klines" and interval not in KLINE_INTERVALS:
+            raise ValueError(f"无效的K线间隔: {interval}")
+        
+        if data_type == "klines":
+            file_path = os.path.join(
+                self.data_directory, market_type, "monthly", data_type,
+                symbol, interval, f"{symbol}-{interval}-{year_month}.zip"
+            )
         else:
-            return self._read_all_data(files, data_type, market_type)
+            file_path = os.path.join(
+                self.data_directory, market_type, "monthly", data_type,
+                symbol, f"{symbol}-{data_type}-{year_month}.zip"
+            )
+        
+        if not os.path.exists(file_path):
+            print(f"未找到 {symbol} {year_month} 的月度数据文件")
+            return pd.DataFrame()
+        
+        print(f"读取文件: {os.path.basename(file_path)}")
+        return self._read_zip_file(file_path, data_type, market_type, nrows, columns)
     
-    def _read_all_data(self, files: List[str], data_type: str, market_type: str) -> pd.DataFrame:
-        """读取所有数据文件"""
+    def _read_all_data(self, files: List[str], data_type: str, market_type: str,
+                       nrows: Optional[int] = None,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取所有数据文件，nrows指定时读够行数即停止"""
+        if nrows is None and len(files) > 1:
+            # 不限制行数时每个文件都要完整解析，用线程池并行解压和解析
+            # （zlib解压和pandas的C解析器都会释放GIL），map保证结果按文件顺序排列
+            def read_one(file_path):
+                print(f"读取文件: {os.path.basename(file_path)}")
+                return self._read_zip_file(file_path, data_type, market_type, columns=columns)
+            
+            max_workers = min(len(files), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                dfs = [df for df in executor.map(read_one, files) if not df.empty]
+            
+            if not dfs:
+                return pd.DataFrame()
+            return pd.concat(dfs, ignore_index=True)
+        
         dfs = []
+        collected = 0
         
         for file_path in files:
+            if nrows is not None and collected >= nrows:
+                break
             print(f"读取文件: {os.path.basename(file_path)}")
-            df = self._read_zip_file(file_path, data_type, market_type)
+            remaining = None if nrows is None else nrows - collected
+            df = self._read_zip_file(file_path, data_type, market_type, remaining, columns)
             if not df.empty:
                 dfs.append(df)
+                collected += len(df)
         
         if not dfs:
             return pd.DataFrame()
@@ -195,30 +433,38 @@ class BinanceDataReader:
         return result
     
     def _read_data_chunks(self, files: List[str], data_type: str, market_type: str,
-                         chunk_size: int) -> Iterator[pd.DataFrame]:
-        """分块读取数据文件"""
+                         chunk_size: int,
+                         columns: Optional[List[str]] = None,
+                         nrows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """分块读取数据文件，每次产出chunk_size行（最后一块可能不足），nrows指定时总共最多产出nrows行"""
         current_chunk = []
         current_size = 0
+        collected = 0
         
         for file_path in files:
+            if nrows is not None and collected >= nrows:
+                break
             print(f"读取文件: {os.path.basename(file_path)}")
-            df = self._read_zip_file(file_path, data_type, market_type)
-            
-            if df.empty:
-                continue
-            
-            current_chunk.append(df)
-            current_size += len(df)
-            
-            if current_size >= chunk_size:
-                result = pd.concat(current_chunk, ignore_index=True)
-                current_chunk = []
-                current_size = 0
+            for df in self._iter_zip_file(file_path, data_type, market_type, chunk_size, columns):
+                if nrows is not None:
+                    df = df.iloc[:nrows - collected]
+                collected += len(df)
+                current_chunk.append(df)
+                current_size += len(df)
+                
+                while current_size >= chunk_size:
+                    result = pd.concat(current_chunk, ignore_index=True)
+                    yield result.iloc[:chunk_size].reset_index(drop=True)
+                    rest = result.iloc[chunk_size:]
+                    current_chunk = [rest] if len(rest) else []
+                    current_size = len(rest)
+                
+                if nrows is not None and collected >= nrows:
+                    break
         
         # 处理剩余数据
         if current_chunk:
-            result = pd.concat(current_chunk, ignore_index=True)
-    
+            yield pd.concat(current_chunk, ignore_index=True)
     
     def get_data_info(self, symbol: str, market_type: str = "spot",
                      data_type: str = "aggTrades", interval: str = "1h") -> dict:
@@ -12,16 +12,17 @@ from config import DEFAULT_CONFIG, KLINE_INTERVALS, MARKET_TYPES, DATA_TYPES
 class HistoricalDataManager:
     """历史数据管理器 - 统一的数据下载和读取接口"""
     
-    def __init__(self, data_directory: str = None):
+    def __init__(self, data_directory: str = None, cache_directory: str = None):
         """
         初始化历史数据管理器
         
         Args:
             data_directory: 数据存储目录
+            cache_directory: 解析结果的磁盘缓存目录，为None时不缓存
         """
         self.data_directory = data_directory or DEFAULT_CONFIG["data_directory"]
         self.downloader = BinanceDataDownloader(self.data_directory)
-        self.reader = BinanceDataReader(self.data_directory)
+        self.reader = BinanceDataReader(self.data_directory, cache_directory)
     
     def download_data(self, symbols: Union[str, List[str]], 
                      market_type: str = "spot", data_type: str = "klines",
@@ -64,7 +65,9 @@ class HistoricalDataManager:
     def read_data(self, symbol: str, market_type: str = "spot",
                  data_type: str = "klines", interval: str = "1h",
                  start_date: str = "2020-01-01", end_date: str = None,
-                 chunk_size: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+                 chunk_size: Optional[int] = None,
+                 nrows: Optional[int] = None,
+                 columns: Optional[List[str]] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         读取历史数据
         
@@ -76,6 +79,8 @@ class HistoricalDataManager:
             start_date: 开始日期 (YYYY-MM-DD)
             end_date: 结束日期 (YYYY-MM-DD)
             chunk_size: 分块大小，如果指定则返回生成器
+            nrows: 最多读取的行数，读够后不再解析后续文件
+            columns: 只读取指定的列，默认读取全部列
             
         Returns:
             DataFrame或生成器
@@ -90,7 +95,97 @@ class HistoricalDataManager:
             interval=interval,
             start_date=start_date,
             end_date=end_date,
-            chunk_size=chunk_size
+            chunk_size=chunk_size,
+            nrows=nrows,
+            columns=columns
+        )
+    
+    def read_files(self, files: List[str], market_type: str = "spot",
+                   data_type: str = "klines", nrows: Optional[int] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        直接读取给定的数据文件（如download_data的返回值），不再扫描数据目录
+        
+        Args:
+            files: ZIP文件路径列表
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            nrows: 最多读取的行数
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            DataFrame
+        """
+        self._validate_parameters(market_type, data_type)
+        
+        return self.reader.read_files(
+            files=files,
+            market_type=market_type,
+            data_type=data_type,
+            nrows=nrows,
+            columns=columns
+        )
+    
+    def read_latest(self, symbol: str, market_type: str = "spot",
+                    data_type: str = "klines", interval: str = "1h",
+                    n: int = 10, end_date: str = None,
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        读取最新的n条数据
+        
+        Args:
+            symbol: 交易对
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            interval: K线间隔 (仅对klines有效)
+            n: 返回的行数
+            end_date: 结束日期 (YYYY-MM-DD)，默认今天
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            按时间顺序排列的最新n条数据
+        """
+        self._validate_parameters(market_type, data_type, interval)
+        
+        return self.reader.read_latest(
+            symbol=symbol,
+            market_type=market_type,
+            data_type=data_type,
+            interval=interval,
+            n=n,
+            end_date=end_date,
+            columns=columns
+        )
+    
+    def read_monthly(self, symbol: str, year_month: str, market_type: str = "spot",
+                     data_type: str = "klines", interval: str = "1h",
+                     nrows: Optional[int] = None,
+                     columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        读取某个月的月度数据文件
+        
+        Args:
+            symbol: 交易对
+            year_month: 月份 (YYYY-MM)
+            market_type: 市场类型 (spot, um, cm)
+            data_type: 数据类型 (klines, trades, aggTrades)
+            interval: K线间隔 (仅对klines有效)
+            nrows: 最多读取的行数
+            columns: 只读取指定的列，默认读取全部列
+        
+        Returns:
+            DataFrame
+        """
+        self._validate_parameters(market_type, data_type, interval)
+        
+        return self.reader.read_monthly(
+            symbol=symbol,
+            year_month=year_month,
+            market_type=market_type,
+            data_type=data_type,
+            interval=interval,
+            nrows=nrows,
+            columns=columns
         )
     
     def get_data_info(self, symbol: str, market_type: str = "spot",
@@ -228,6 +323,14 @@ class HistoricalDataManager:
             "total_files": 0
         }
         
+        # 解析缓存（.pkl）单独统计，并计入总量
+        cache_directory = self.reader.cache_directory
+        if cache_directory and os.path.exists(cache_directory):
+            cache_stats = self._get_directory_stats(cache_directory, '.pkl')
+            stats["cache"] = dict(cache_stats, directory=cache_directory)
+            stats["total_size_mb"] += cache_stats["size_mb"]
+            stats["total_files"] += cache_stats["file_count"]
+        
         if not os.path.exists(self.data_directory):
             return stats
         
@@ -241,14 +344,14 @@ class HistoricalDataManager:
         
         return stats
     
-    def _get_directory_stats(self, directory: str) -> dict:
-        """获取目录统计信息"""
+    def _get_directory_stats(self, directory: str, extension: str = '.zip') -> dict:
+        """获取目录中指定扩展名文件的统计信息"""
         total_size = 0
         file_count = 0
         
         for root, dirs, files in os.walk(directory):
             for file in files:
-                if file.endswith('.zip'):
+                if file.endswith(extension):
                     file_path = os.path.join(root, file)
                     total_size += os.path.getsize(file_path)
                     file_count += 1
@@ -260,7 +363,7 @@ class HistoricalDataManager:
     
     def cleanup_old_data(self, days_to_keep: int = 30) -> int:
         """
-        清理旧数据文件
+        清理旧数据文件（包括解析缓存）
         
         Args:
             days_to_keep: 保留的天数
@@ -268,15 +371,25 @@ class HistoricalDataManager:
         Returns:
             删除的文件数量
         """
-        if not os.path.exists(self.data_directory):
+        cutoff_time = datetime.now().timestamp() - (days_to_keep * 24 * 3600)
+        deleted_count = self._remove_old_files(self.data_directory, '.zip', cutoff_time)
+        
+        # 缓存文件名是哈希值，无法对应回ZIP文件，按同样的保留期限清理
+        if self.reader.cache_directory:
+            deleted_count += self._remove_old_files(self.reader.cache_directory, '.pkl', cutoff_time)
+        
+        return deleted_count
+    
+    def _remove_old_files(self, directory: str, extension: str, cutoff_time: float) -> int:
+        """删除目录中修改时间早于cutoff_time的指定扩展名文件"""
+        if not os.path.exists(directory):
             return 0
         
-        cutoff_time = datetime.now().timestamp() - (days_to_keep * 24 * 3600)
         deleted_count = 0
         
-        for root, dirs, files in os.walk(self.data_directory):
+        for root, dirs, files in os.walk(directory):
             for file in files:
-                if file.endswith('.zip'):
+                if file.endswith(extension):
                     file_path = os.path.join(root, file)
                     if os.path.getmtime(file_path) < cutoff_time:
                         try:
@@ -286,4 +399,4 @@ class HistoricalDataManager:
                         except OSError as e:
                             print(f"删除文件失败 {file}: {e}")
         
-        return deleted_count
\ No newline at end of file
+        return deleted_count
@@ -0,0 +1,102 @@
+"""脚本共用的 "下载 → 读取 → 输出" 流程
+
+每个数据配置是一个字典，至少包含 symbol、market_type、data_type，
+klines 还需要 interval。所有配置并发执行，阻塞的下载和读取在工作线程中进行，
+进程内共享同一个 HistoricalDataManager（同一个HTTP连接池）。
+同时处理的配置数量取自 config.py 的 max_concurrent_downloads，避免触发币安数据站点的限流。
+"""
+import asyncio
+import functools
+from typing import Callable, Iterable, List
+
+from config import DEFAULT_CONFIG
+from historical_data_manager import HistoricalDataManager
+
+
+@functools.lru_cache(maxsize=None)
+def get_manager(data_directory: str = None, cache_directory: str = None) -> HistoricalDataManager:
+    """获取进程内共享的数据管理器
+    
+    解析结果默认缓存在config.py的script_cache_directory下，两个每日脚本读取同一天的相同文件时，
+    后运行的脚本直接加载缓存，不再重复解压和解析。该配置为None时不缓存。
+    """
+    return HistoricalDataManager(
+        data_directory, cache_directory or DEFAULT_CONFIG["script_cache_directory"]
+    )
+
+
+async def run_concurrently(items: Iterable, worker: Callable) -> list:
+    """在工作线程中并发执行worker(item)
+    
+    Args:
+        items: 待处理的配置
+        worker: 同步处理函数，参数为单个item
+    
+    Returns:
+        与items一一对应的结果列表，元素为worker的返回值或处理时抛出的异常
+    """
+    semaphore = asyncio.Semaphore(DEFAULT_CONFIG["max_concurrent_downloads"])
+    
+    async def run(item):
+        async with semaphore:
+            return await asyncio.to_thread(worker, item)
+    
+    return await asyncio.gather(*[run(item) for item in items], return_exceptions=True)
+
+
+def fetch_config(manager, config: dict, date_str: str, writer_fn: Callable,
+                 nrows: int = None, columns: List[str] = None):
+    """下载并读取单个配置在date_str当天的数据，再交给writer_fn(config, data)输出
+    
+    Returns:
+        (下载成功的文件列表, writer_fn的返回值)
+    """
+    download_params = {
+        'symbols': [config['symbol']],
+        'market_type': config['market_type'],
+        'data_type': config['data_type'],
+        'start_date': date_str,
+        'end_date': date_str
+    }
+    
+    # 如果是klines数据，添加interval参数
+    if config['data_type'] == 'klines':
+        download_params['interval'] = config['interval']
+    
+    files = manager.download_data(**download_params)
+    
+    # 直接读取刚下载的文件，读够nrows行即停止解析
+    data = manager.read_files(
+        files,
+        market_type=config['market_type'],
+        data_type=config['data_type'],
+        nrows=nrows,
+        columns=columns
+    )
+    
+    return files, writer_fn(config, data)
+
+
+async def fetch_and_dump(configs: List[dict], date_str: str, writer_fn: Callable,
+                         nrows: int = None, columns: List[str] = None,
+                         manager=None) -> list:
+    """并发处理所有配置
+    
+    Args:
+        configs: 数据配置列表
+        date_str: 数据日期 (YYYY-MM-DD)
+        writer_fn: 输出函数，参数为 (config, data)
+        nrows: 每个配置最多读取的行数
+        columns: 只读取指定的列，默认读取全部列
+        manager: 数据管理器，默认使用进程内共享的实例
+    
+    Returns:
+        与configs一一对应的结果列表，元素为 (下载成功的文件列表, writer_fn的返回值)
+        或处理时抛出的异常
+    """
+    manager = manager or get_manager()
+    worker = functools.partial(
+        fetch_config, manager, date_str=date_str, writer_fn=writer_fn,
+        nrows=nrows, columns=columns
+    )
+    return await run_concurrently(configs, worker)
@@ -6,6 +6,8 @@
 包括昨天和上个月的数据，每种获取前20条记录
 """
 
+import asyncio
+import functools
 import os
 import sys
 from datetime import datetime, timedelta
@@ -18,6 +20,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from data_downloader import BinanceDataDownloader
 from data_reader import BinanceDataReader
 from config import get_market_path_prefix
+from _common import run_concurrently
 
 # 配置日志
 logging.basicConfig(
@@ -41,42 +44,38 @@ def get_date_strings():
     
     return yesterday_str, last_month_str
 
-def download_data_if_needed(downloader, symbol, market_type, data_type, date_str, interval=None, is_monthly=False):
-    """如果需要则下载数据"""
+def get_date_range(period, yesterday_str, last_month_str):
+    """获取配置周期对应的开始和结束日期"""
+    if period == 'monthly':
+        # 月度数据：从月初到月末
+        return last_month_str + '-01', last_month_str + '-28'  # 保守的月末日期
+    # 日度数据
+    return yesterday_str, yesterday_str
+
+def download_config(downloader, config, yesterday_str, last_month_str):
+    """下载单个数据配置的数据"""
+    symbol = config['symbol']
+    market_type = config['market_type']
+    data_type = config['data_type']
+    start_date, end_date = get_date_range(config['period'], yesterday_str, last_month_str)
+    is_monthly = (config['period'] == 'monthly')
     try:
-        # 使用通用的download_data方法
-        if is_monthly:
-            # 月度数据：从月初到月末
-            start_date = date_str + '-01'
-            end_date = date_str + '-28'  # 保守的月末日期
-            downloader.download_data(
-                symbols=[symbol],
-                market_type=market_type,
-                data_type=data_type,
-                interval=interval or '1h',
-                start_date=start_date,
-                end_date=end_date,
-                download_monthly=True,
-                download_daily=False
-            )
-        else:
-            # 日度数据
-            downloader.download_data(
-                symbols=[symbol],
-                market_type=market_type,
-                data_type=data_type,
-                interval=interval or '1h',
-                start_date=date_str,
-                end_date=date_str,
-                download_monthly=False,
-                download_daily=True
-            )
+        downloader.download_data(
+            symbols=[symbol],
+            market_type=market_type,
+            data_type=data_type,
+            interval=config.get('interval') or '1h',
+            start_date=start_date,
+            end_date=end_date,
+            download_monthly=is_monthly,
+            download_daily=not is_monthly
+        )
         return True
     except Exception as e:
         logger.warning(f"下载数据失败 {symbol} {market_type} {data_type}: {e}")
         return False
 
-def process_data_config(config, output_dir, yesterday_str, last_month_str):
+def process_data_config(reader, config, output_dir, yesterday_str, last_month_str):
     """处理单个数据配置"""
     symbol = config['symbol']
     market_type = config['market_type']
@@ -84,48 +83,39 @@ def process_data_config(config, output_dir, yesterday_str, last_month_str):
     interval = config.get('interval')
     period = config['period']  # 'daily' or 'monthly'
     
-    # 确定日期字符串
-    date_str = yesterday_str if period == 'daily' else last_month_str
-    
     # 构建文件名
     if interval:
-        filename = f"{symbol.lower()}_{market_type}_{data_type}_{interval}_{period}_top20.csv"
+        filename = f"{symbol.lower()}_{market_type}_{data_type}_{interval}_{period}_top20.csv.gz"
     else:
-        filename = f"{symbol.lower()}_{market_type}_{data_type}_{period}_top20.csv"
+        filename = f"{symbol.lower()}_{market_type}_{data_type}_{period}_top20.csv.gz"
     
     output_path = os.path.join(output_dir, filename)
     
     logger.info(f"\n处理配置: {symbol} {market_type} {data_type} {interval or ''} ({period})")
     
     try:
-        # 初始化下载器和读取器
-        downloader = BinanceDataDownloader()
-        reader = BinanceDataReader()
-        
-        # 尝试下载数据
-        is_monthly = (period == 'monthly')
-        download_success = download_data_if_needed(
-            downloader, symbol, market_type, data_type, date_str, interval, is_monthly
-        )
-        
-        # 读取数据
+        # 读取数据（数据已在main中下载）
         if period == 'monthly':
-            # 月度数据：读取整个月
-            start_date = date_str + '-01'
-            end_date = date_str + '-28'
+            # 月度数据：直接打开当月的月度文件，只解析前20行
+            df = reader.read_monthly(
+                symbol=symbol,
+                market_type=market_type,
+                data_type=data_type,
+                interval=interval or '1h',
+                year_month=last_month_str,
+                nrows=20
+            )
         else:
-            # 日度数据
-            start_date = date_str
-            end_date = date_str
-            
-        df = reader.read_data(
-            symbol=symbol,
-            market_type=market_type,
-            data_type=data_type,
-            interval=interval or '1h',
-            start_date=start_date,
-            end_date=end_date
-        )
+            start_date, end_date = get_date_range(period, yesterday_str, last_month_str)
+            df = reader.read_data(
+                symbol=symbol,
+                market_type=market_type,
+                data_type=data_type,
+                interval=interval or '1h',
+                start_date=start_date,
+                end_date=end_date,
+                nrows=20
+            )
         
         if df is None or df.empty:
             logger.warning(f"没有找到数据: {symbol} {market_type} {data_type}")
@@ -135,19 +125,16 @@ def process_data_config(config, output_dir, yesterday_str, last_month_str):
         top_20 = df.head(20)
         
         # 保存到CSV
-        top_20.to_csv(output_path, index=False)
+        top_20.to_csv(output_path, index=False, compression='gzip')
         
         logger.info(f"成功保存 {len(top_20)} 条记录到: {filename}")
         
-        # 显示数据预览
-        logger.info(f"数据预览 - 前3条:")
-        for i, row in top_20.head(3).iterrows():
-            logger.info(f"  [{i}] {dict(row)}")
-        
-        if len(top_20) > 3:
-            logger.info(f"后3条:")
-            for i, row in top_20.tail(3).iterrows():
-                logger.info(f"  [{i}] {dict(row)}")
+        # 显示数据预览（日志级别高于INFO时跳过格式化）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("数据预览 - 前3条:\n%s", top_20.head(3).to_string())
+            
+            if len(top_20) > 3:
+                logger.info("后3条:\n%s", top_20.tail(3).to_string())
         
         logger.info("-" * 60)
         return True
@@ -186,14 +173,25 @@ def main():
         {'symbol': 'ETHUSD_PERP', 'market_type': 'cm', 'data_type': 'aggTrades', 'period': 'monthly'},
     ]
     
+    # 初始化下载器和读取器，所有下载共享同一个HTTP会话
+    downloader = BinanceDataDownloader()
+    reader = BinanceDataReader()
+    
     logger.info(f"\n开始处理 {len(configs)} 个数据配置...")
     logger.info("=" * 80)
     
-    # 处理所有配置
-    success_count = 0
-    for config in configs:
-        if process_data_config(config, output_dir, yesterday_str, last_month_str):
-            success_count += 1
+    # 先并发下载所有配置（月度数据需要下载月度文件，不适用fetch_and_dump的单日流程）
+    asyncio.run(run_concurrently(configs, functools.partial(
+        download_config, downloader,
+        yesterday_str=yesterday_str, last_month_str=last_month_str
+    )))
+    
+    # 再并发读取并保存每个配置
+    results = asyncio.run(run_concurrently(configs, functools.partial(
+        process_data_config, reader, output_dir=output_dir,
+        yesterday_str=yesterday_str, last_month_str=last_month_str
+    )))
+    success_count = sum(1 for result in results if result is True)
     
     # 显示结果摘要
     logger.info(f"\n{'='*80}")
@@ -202,13 +200,12 @@ def main():
     
     # 列出生成的文件
     if os.path.exists(output_dir):
-        files = [f for f in os.listdir(output_dir) if f.endswith('.csv')]
-        if files:
+        with os.scandir(output_dir) as it:
+            entries = sorted((e for e in it if e.name.endswith('.csv.gz')), key=lambda e: e.name)
+        if entries:
             logger.info(f"\n输出文件列表:")
-            for file in sorted(files):
-                file_path = os.path.join(output_dir, file)
-                file_size = os.path.getsize(file_path)
-                logger.info(f"  {file} ({file_size} bytes)")
+            for entry in entries:
+                logger.info(f"  {entry.name} ({entry.stat().st_size} bytes)")
         else:
             logger.warning("没有生成任何CSV文件")
     
@@ -5,17 +5,25 @@ ETHUSD全市场数据获取脚本
 获取ETHUSD相关的spot、um、cm市场下的日级别和月级别数据
 """
 
+import asyncio
+import functools
 import os
 import logging
+import logging.handlers
 from datetime import datetime, timedelta
 from historical_data_manager import HistoricalDataManager
+from _common import run_concurrently
 
 # 设置日志
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# 文件日志先缓存在内存中，攒满1024条或遇到ERROR时再批量写盘
+file_handler = logging.FileHandler('ethusd_all_data.log', encoding='utf-8')
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('ethusd_all_data.log', encoding='utf-8'),
+        logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=file_handler),
         logging.StreamHandler()
     ]
 )
@@ -29,67 +37,49 @@ def create_output_directory():
         logger.info(f"创建输出目录: {output_dir}")
     return output_dir
 
-def download_data_if_needed(manager, symbol, market_type, data_type, interval=None):
+def download_data_if_needed(manager, symbol, market_type, data_type, yesterday, interval=None):
     """如果需要，下载数据"""
     try:
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
         logger.info(f"尝试下载 {symbol} {market_type} {data_type} 数据...")
         
+        params = {
+            "symbols": [symbol],
+            "market_type": market_type,
+            "data_type": data_type,
+            "start_date": yesterday,
+            "end_date": yesterday
+        }
         if data_type == "klines" and interval:
-            manager.download_data(
-                symbol=symbol,
-                market_type=market_type,
-                data_type=data_type,
-                interval=interval,
-                start_date=yesterday,
-                end_date=yesterday
-            )
-        else:
-            manager.download_data(
-                symbol=symbol,
-                market_type=market_type,
-                data_type=data_type,
-                start_date=yesterday,
-                end_date=yesterday
-            )
+            params["interval"] = interval
+        
+        manager.download_data(**params)
         return True
     except Exception as e:
         logger.warning(f"下载 {symbol} {market_type} {data_type} 数据失败: {e}")
         return False
 
-def get_latest_data(manager, symbol, market_type, data_type, interval=None, limit=10):
-    """获取最新数据"""
+def get_latest_data(manager, symbol, market_type, data_type, yesterday, interval=None, limit=10):
+    """获取最新数据，以昨天作为结束日期"""
     try:
-        # 获取昨天的日期作为结束日期
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-        start_date = "2024-01-01"  # 从较早日期开始确保能获取到数据
-        
         logger.info(f"正在获取 {symbol} {market_type} {data_type} 数据...")
         
+        params = {
+            "symbol": symbol,
+            "market_type": market_type,
+            "data_type": data_type,
+            "n": limit,
+            "end_date": yesterday
+        }
         if data_type == "klines" and interval:
-            df = manager.read_data(
-                symbol=symbol,
-                market_type=market_type,
-                data_type=data_type,
-                interval=interval,
-                start_date=start_date,
-                end_date=yesterday
-            )
-        else:
-            df = manager.read_data(
-                symbol=symbol,
-                market_type=market_type,
-                data_type=data_type,
-                start_date=start_date,
-                end_date=yesterday
-            )
+            params["interval"] = interval
         
-        if df.empty:
+        # 从昨天开始倒序读取文件，读够limit条即停止
+        latest_data = manager.read_latest(**params)
+        
+        if latest_data.empty:
             logger.warning(f"未获取到 {symbol} {market_type} {data_type} 数据")
             return None
         
-        # 获取最新的limit条数据
-        latest_data = df.tail(limit)
         logger.info(f"成功获取 {symbol} {market_type} {data_type} 最新 {len(latest_data)} 条数据")
         return latest_data
         
@@ -101,12 +91,12 @@ def save_to_csv(df, output_dir, filename):
     """保存数据到CSV文件"""
     if df is not None and not df.empty:
         filepath = os.path.join(output_dir, filename)
-        df.to_csv(filepath, index=False, encoding='utf-8')
+        df.to_csv(filepath, index=False, encoding='utf-8', compression='gzip')
         logger.info(f"数据已保存到: {filepath}")
         return True
     return False
 
-def process_data_config(manager, config, output_dir):
+def process_data_config(manager, config, output_dir, yesterday):
     """处理单个数据配置"""
     logger.info(f"\n处理配置: {config['symbol']} - {config['market_type']} - {config['data_type']}")
     
@@ -116,6 +106,7 @@ def process_data_config(manager, config, output_dir):
         symbol=config["symbol"],
         market_type=config["market_type"],
         data_type=config["data_type"],
+        yesterday=yesterday,
         interval=config.get("interval")
     )
     
@@ -125,6 +116,7 @@ def process_data_config(manager, config, output_dir):
         symbol=config["symbol"],
         market_type=config["market_type"],
         data_type=config["data_type"],
+        yesterday=yesterday,
         interval=config.get("interval"),
         limit=10
     )
@@ -132,20 +124,16 @@ def process_data_config(manager, config, output_dir):
     # 保存数据
     success = save_to_csv(df, output_dir, config["filename"])
     
-    if success and df is not None and not df.empty:
-        # 显示数据预览
-        logger.info(f"数据预览 ({config['filename']}):")
-        logger.info(f"数据形状: {df.shape}")
-        logger.info(f"列名: {list(df.columns)}")
+    if success and df is not None and not df.empty and logger.isEnabledFor(logging.INFO):
+        # 显示数据预览（日志级别高于INFO时跳过格式化）
+        logger.info("数据预览 (%s):", config['filename'])
+        logger.info("数据形状: %s", df.shape)
+        logger.info("列名: %s", list(df.columns))
         if len(df) > 0:
             # 显示前3条和后3条数据
-            logger.info("前3条数据:")
-            for i, row in df.head(3).iterrows():
-                logger.info(f"  [{i}] {row.to_dict()}")
+            logger.info("前3条数据:\n%s", df.head(3).to_string())
             if len(df) > 3:
-                logger.info("后3条数据:")
-                for i, row in df.tail(3).iterrows():
-                    logger.info(f"  [{i}] {row.to_dict()}")
+                logger.info("后3条数据:\n%s", df.tail(3).to_string())
     
     logger.info("-" * 60)
     return success
@@ -154,7 +142,9 @@ def main():
     """主函数"""
     logger.info("="*80)
     logger.info("开始获取ETHUSD全市场数据")
-    logger.info(f"当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    now = datetime.now()
+    yesterday = (now - timedelta(days=1)).strftime("%Y-%m-%d")
+    logger.info(f"当前时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("="*80)
     
     # 创建输出目录
@@ -166,28 +156,30 @@ def main():
     # 定义要获取的数据配置 - 只包含实际可能存在的数据类型
     data_configs = [
         # ETHUSDT Spot 数据
-        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "klines", "interval": "1h", "filename": "ethusdt_spot_klines_1h_latest10.csv"},
-        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "klines", "interval": "1d", "filename": "ethusdt_spot_klines_1d_latest10.csv"},
-        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "aggTrades", "filename": "ethusdt_spot_aggtrades_latest10.csv"},
+        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "klines", "interval": "1h", "filename": "ethusdt_spot_klines_1h_latest10.csv.gz"},
+        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "klines", "interval": "1d", "filename": "ethusdt_spot_klines_1d_latest10.csv.gz"},
+        {"symbol": "ETHUSDT", "market_type": "spot", "data_type": "aggTrades", "filename": "ethusdt_spot_aggtrades_latest10.csv.gz"},
         
         # ETHUSDT UM Futures 数据
-        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "klines", "interval": "1h", "filename": "ethusdt_um_klines_1h_latest10.csv"},
-        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "klines", "interval": "1d", "filename": "ethusdt_um_klines_1d_latest10.csv"},
-        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "aggTrades", "filename": "ethusdt_um_aggtrades_latest10.csv"},
+        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "klines", "interval": "1h", "filename": "ethusdt_um_klines_1h_latest10.csv.gz"},
+        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "klines", "interval": "1d", "filename": "ethusdt_um_klines_1d_latest10.csv.gz"},
+        {"symbol": "ETHUSDT", "market_type": "um", "data_type": "aggTrades", "filename": "ethusdt_um_aggtrades_latest10.csv.gz"},
         
         # ETHUSD_PERP CM Futures 数据
-        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "klines", "interval": "1h", "filename": "ethusd_perp_cm_klines_1h_latest10.csv"},
-        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "klines", "interval": "1d", "filename": "ethusd_perp_cm_klines_1d_latest10.csv"},
-        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "aggTrades", "filename": "ethusd_perp_cm_aggtrades_latest10.csv"},
+        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "klines", "interval": "1h", "filename": "ethusd_perp_cm_klines_1h_latest10.csv.gz"},
+        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "klines", "interval": "1d", "filename": "ethusd_perp_cm_klines_1d_latest10.csv.gz"},
+        {"symbol": "ETHUSD_PERP", "market_type": "cm", "data_type": "aggTrades", "filename": "ethusd_perp_cm_aggtrades_latest10.csv.gz"},
     ]
     
-    success_count = 0
     total_count = len(data_configs)
     
-    # 获取并保存每种类型的数据
-    for config in data_configs:
-        if process_data_config(manager, config, output_dir):
-            success_count += 1
+    # 并发获取并保存每种类型的数据（读取最新数据可能跨越多天，不适用fetch_and_dump的单日读取）
+    worker = functools.partial(process_data_config, manager, output_dir=output_dir, yesterday=yesterday)
+    results = asyncio.run(run_concurrently(data_configs, worker))
+    for config, result in zip(data_configs, results):
+        if isinstance(result, Exception):
+            logger.error(f"处理配置 {config['filename']} 时出错: {result}")
+    success_count = sum(1 for result in results if result is True)
     
     logger.info("\n" + "="*80)
     logger.info(f"数据获取完成！成功: {success_count}/{total_count}")
@@ -196,15 +188,17 @@ def main():
     # 显示输出目录内容
     logger.info("\n输出文件列表:")
     try:
-        for filename in os.listdir(output_dir):
-            if filename.endswith('.csv'):
-                filepath = os.path.join(output_dir, filename)
-                size = os.path.getsize(filepath)
-                logger.info(f"  {filename} ({size} bytes)")
+        with os.scandir(output_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.csv.gz'):
+                    logger.info(f"  {entry.name} ({entry.stat().st_size} bytes)")
     except Exception as e:
         logger.error(f"列出输出文件时出错: {e}")
     
     logger.info("="*80)
+    
+    # 将内存中缓存的日志写入文件
+    logging.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
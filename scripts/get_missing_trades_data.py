@@ -6,7 +6,6 @@
 
 import os
 import sys
-import pandas as pd
 from datetime import datetime, timedelta
 
 # 添加项目根目录到Python路径
@@ -15,9 +14,9 @@ sys.path.append('/Users/pm/work_ai/binance_trading_system')
 from data_downloader import BinanceDataDownloader
 from data_reader import BinanceDataReader
 
-def get_yesterday_date():
+def get_yesterday_date(now=None):
     """获取昨天的日期字符串"""
-    yesterday = datetime.now() - timedelta(days=1)
+    yesterday = (now or datetime.now()) - timedelta(days=1)
     return yesterday.strftime('%Y-%m-%d')
 
 def download_data_if_needed(downloader, market_type, data_type, symbol, date_str):
@@ -50,7 +49,8 @@ def read_and_save_data(reader, market_type, data_type, symbol, date_str, output_
             data_type=data_type,
             symbol=symbol,
             start_date=date_str,
-            end_date=date_str
+            end_date=date_str,
+            nrows=limit
         )
         
         if df is None or df.empty:
@@ -62,13 +62,13 @@ def read_and_save_data(reader, market_type, data_type, symbol, date_str, output_
         
         # 生成文件名
         if market_type == "cm":
-            filename = f"{symbol.lower()}_{market_type}_{data_type}_top{limit}.csv"
+            filename = f"{symbol.lower()}_{market_type}_{data_type}_top{limit}.csv.gz"
         else:
-            filename = f"{symbol.lower()}_{market_type}_{data_type}_top{limit}.csv"
+            filename = f"{symbol.lower()}_{market_type}_{data_type}_top{limit}.csv.gz"
         filepath = os.path.join(output_dir, filename)
         
         # 保存到CSV
-        top_records.to_csv(filepath, index=False)
+        top_records.to_csv(filepath, index=False, compression="gzip")
         
         print(f"✓ 已保存 {len(top_records)} 条记录到 {filename}")
         print(f"  数据预览 (前3行):")
@@ -85,10 +85,11 @@ def read_and_save_data(reader, market_type, data_type, symbol, date_str, output_
 
 def main():
     print("=== 获取缺失的ETHUSDT和ETHUSD永续trades数据 ===")
-    print(f"当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    now = datetime.now()
+    print(f"当前时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 获取昨天日期
-    yesterday = get_yesterday_date()
+    yesterday = get_yesterday_date(now)
     print(f"目标日期: {yesterday}")
     
     # 使用与之前相同的输出目录
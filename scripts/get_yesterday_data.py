@@ -64,20 +64,17 @@ def get_yesterday_ethusdt_data():
         logger.info("前200条ETHUSDT数据详情:")
         logger.info("=" * 80)
         
-        for i, row in data_200.iterrows():
-            logger.info(
-                f"[{i+1:3d}] 时间: {row['open_time']} | "
-                f"开: {row['open']:8.4f} | 高: {row['high']:8.4f} | "
-                f"低: {row['low']:8.4f} | 收: {row['close']:8.4f} | "
-                f"量: {row['volume']:10.2f}"
-            )
+        # to_string 的参数会被立即求值，日志级别高于INFO时直接跳过
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", data_200[['open_time', 'open', 'high', 'low', 'close', 'volume']]
+                        .to_string(index=True, float_format='%.4f'))
         
         logger.info("=" * 80)
         logger.info(f"数据输出完成，共输出 {len(data_200)} 条记录")
         
         # 保存前200条数据到CSV文件
-        output_file = f"ethusdt_{yesterday}_top200.csv"
-        data_200.to_csv(output_file, index=False)
+        output_file = f"ethusdt_{yesterday}_top200.csv.gz"
+        data_200.to_csv(output_file, index=False, compression="gzip")
         logger.info(f"数据已保存到文件: {output_file}")
         
     except Exception as e:
@@ -10,40 +10,63 @@
 - 每种数据类型输出前100条到单独的日志文件
 """
 
-import os
+import asyncio
+import atexit
+import functools
+import pathlib
+import queue
 import sys
 from datetime import datetime, timedelta
 import logging
+import logging.handlers
 
 # 添加项目根目录到Python路径
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
 
-from historical_data_manager import HistoricalDataManager
+# 日志目录
+LOG_DIR = PROJECT_ROOT / 'logs'
+
+from _common import fetch_and_dump
 
 def setup_logging():
     """设置日志配置"""
     # 创建logs目录
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-    os.makedirs(logs_dir, exist_ok=True)
+    logs_dir = LOG_DIR
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    
+    # 配置主日志：并发任务只把日志记录放入队列，由后台监听线程统一写文件，
+    # 避免各工作线程在文件处理器的锁上排队等待磁盘写入
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+    file_handler = logging.FileHandler(logs_dir / 'eth_data_extraction.log', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(log_format))
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # 队列处理器只传递原始消息，完整格式由文件处理器负责，避免重复格式化
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     
-    # 配置主日志
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[
-            logging.FileHandler(os.path.join(logs_dir, 'eth_data_extraction.log'), encoding='utf-8'),
+            queue_handler,
             logging.StreamHandler()
         ]
     )
     return logs_dir
 
+@functools.lru_cache(maxsize=1)
 def get_yesterday_date():
     """获取昨天的日期"""
     # 由于昨天的数据可能不可用，使用今天的日期进行演示
     yesterday = datetime.now() - timedelta(days=2)
     return yesterday.strftime('%Y-%m-%d')
 
-def save_data_to_log(data, filename, logs_dir, data_type, symbol, market_type, interval=None):
+def save_data_to_log(data, filename, logs_dir, data_type, symbol, market_type, data_date, interval=None):
     """保存数据到日志文件"""
     if data is None or len(data) == 0:
         logging.warning(f"没有获取到 {symbol} {market_type} {data_type} 数据")
@@ -53,42 +76,54 @@ def save_data_to_log(data, filename, logs_dir, data_type, symbol, market_type, i
     data_subset = data.head(100)
     
     # 创建日志文件路径
-    log_file = os.path.join(logs_dir, filename)
+    log_file = logs_dir / filename
     
-    with open(log_file, 'w', encoding='utf-8') as f:
+    # 使用1MiB写缓冲，整个文件在关闭时一次性落盘
+    with open(log_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
         f.write(f"=== {symbol} {market_type.upper()} {data_type.upper()}")
         if interval:
             f.write(f" ({interval})")
         f.write(f" 数据 ===\n")
         f.write(f"获取时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"数据日期: {get_yesterday_date()}\n")
+        f.write(f"数据日期: {data_date}\n")
         f.write(f"数据条数: {len(data_subset)}\n")
         f.write("=" * 80 + "\n\n")
         
-        # 写入数据
-        f.write(data_subset.to_string(index=False))
-        f.write("\n\n")
+        # 写入数据（制表符分隔，使用pandas的C写入路径，比to_string逐格格式化快）
+        data_subset.to_csv(f, index=False, sep='\t')
+        f.write("\n")
         
-        # 写入数据统计信息
+        # 写入数据统计信息（只统计数值列）
         f.write("=== 数据统计信息 ===\n")
-        f.write(data_subset.describe().to_string())
+        f.write(data_subset.select_dtypes('number').describe().to_string())
         f.write("\n")
     
     logging.info(f"已保存 {len(data_subset)} 条 {symbol} {market_type} {data_type} 数据到 {filename}")
 
+def write_config_log(config, data, logs_dir, data_date):
+    """将单个配置的数据写入对应的日志文件"""
+    save_data_to_log(
+        data, 
+        config['filename'], 
+        logs_dir, 
+        config['data_type'],
+        config['symbol'],
+        config['market_type'],
+        data_date,
+        config.get('interval')
+    )
+
 def main():
     """主函数"""
     print(f"当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"获取日期: {get_yesterday_date()}")
+    yesterday = get_yesterday_date()
+    ymd = yesterday.replace("-", "")
+    print(f"获取日期: {yesterday}")
     
     # 设置日志
     logs_dir = setup_logging()
     logging.info("开始获取昨天的ETH相关数据")
     
-    # 初始化数据管理器
-    manager = HistoricalDataManager()
-    yesterday = get_yesterday_date()
-    
     # 定义要获取的数据配置
     data_configs = [
         # ETHUSDT 现货数据
@@ -96,20 +131,20 @@ def main():
             'symbol': 'ETHUSDT',
             'market_type': 'spot',
             'data_type': 'aggTrades',
-            'filename': f'ethusdt_spot_aggtrades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_spot_aggtrades_{ymd}.log'
         },
         {
             'symbol': 'ETHUSDT',
             'market_type': 'spot',
             'data_type': 'klines',
             'interval': '1h',
-            'filename': f'ethusdt_spot_klines_1h_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_spot_klines_1h_{ymd}.log'
         },
         {
             'symbol': 'ETHUSDT',
             'market_type': 'spot',
             'data_type': 'trades',
-            'filename': f'ethusdt_spot_trades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_spot_trades_{ymd}.log'
         },
         
         # ETHUSDT 永续合约 (um)
@@ -117,20 +152,20 @@ def main():
             'symbol': 'ETHUSDT',
             'market_type': 'um',
             'data_type': 'aggTrades',
-            'filename': f'ethusdt_um_aggtrades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_um_aggtrades_{ymd}.log'
         },
         {
             'symbol': 'ETHUSDT',
             'market_type': 'um',
             'data_type': 'trades',
-            'filename': f'ethusdt_um_trades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_um_trades_{ymd}.log'
         },
         {
             'symbol': 'ETHUSDT',
             'market_type': 'um',
             'data_type': 'klines',
             'interval': '1h',
-            'filename': f'ethusdt_um_klines_1h_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusdt_um_klines_1h_{ymd}.log'
         },
         
         # ETHUSD 永续合约 (cm)
@@ -138,74 +173,29 @@ def main():
             'symbol': 'ETHUSD_PERP',
             'market_type': 'cm',
             'data_type': 'aggTrades',
-            'filename': f'ethusd_cm_aggtrades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusd_cm_aggtrades_{ymd}.log'
         },
         {
             'symbol': 'ETHUSD_PERP',
             'market_type': 'cm',
             'data_type': 'trades',
-            'filename': f'ethusd_cm_trades_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusd_cm_trades_{ymd}.log'
         },
         {
             'symbol': 'ETHUSD_PERP',
             'market_type': 'cm',
             'data_type': 'klines',
             'interval': '1h',
-            'filename': f'ethusd_cm_klines_1h_{yesterday.replace("-", "")}.log'
+            'filename': f'ethusd_cm_klines_1h_{ymd}.log'
         }
     ]
     
-    # 处理每个数据配置
-    for config in data_configs:
-        try:
-            logging.info(f"正在获取 {config['symbol']} {config['market_type']} {config['data_type']} 数据...")
-            
-            # 构建参数
-            params = {
-                'symbol': config['symbol'],
-                'market_type': config['market_type'],
-                'data_type': config['data_type'],
-                'start_date': yesterday,
-                'end_date': yesterday
-            }
-            
-            # 如果是klines数据，添加interval参数
-            if config['data_type'] == 'klines':
-                params['interval'] = config['interval']
-            
-            # 先尝试下载数据
-            download_params = {
-                'symbols': [config['symbol']],
-                'market_type': config['market_type'],
-                'data_type': config['data_type'],
-                'start_date': yesterday,
-                'end_date': yesterday
-            }
-            
-            # 如果是klines数据，添加interval参数
-            if config['data_type'] == 'klines':
-                download_params['interval'] = config['interval']
-            
-            logging.info(f"正在下载 {config['symbol']} {config['market_type']} {config['data_type']} 数据...")
-            manager.download_data(**download_params)
-            
-            # 读取数据
-            data = manager.read_data(**params)
-            
-            # 保存数据到日志
-            save_data_to_log(
-                data, 
-                config['filename'], 
-                logs_dir, 
-                config['data_type'],
-                config['symbol'],
-                config['market_type'],
-                config.get('interval')
-            )
-            
-        except Exception as e:
-            logging.error(f"处理 {config['symbol']} {config['market_type']} {config['data_type']} 时出错: {e}")
-            continue
+    # 并发下载、读取并输出所有数据配置（只输出前100条，读够即停止解析）
+    writer = functools.partial(write_config_log, logs_dir=logs_dir, data_date=yesterday)
+    results = asyncio.run(fetch_and_dump(data_configs, yesterday, writer, nrows=100))
+    for config, result in zip(data_configs, results):
+        if isinstance(result, Exception):
+            logging.error(f"处理 {config['symbol']} {config['market_type']} {config['data_type']} 时出错: {result}")
     
     logging.info("所有ETH相关数据获取完成")
     print(f"\n所有日志文件已保存到: {logs_dir}")
@@ -4,55 +4,31 @@
 获取上一天ETHUSDT和ETHUSD各种数据类型的前100条记录
 """
 
+import argparse
+import asyncio
+import functools
+import importlib.util
 import os
 import sys
-import pandas as pd
 from datetime import datetime, timedelta
 
 # 添加项目根目录到Python路径
 sys.path.append('/Users/pm/work_ai/binance_trading_system')
 
-from data_downloader import BinanceDataDownloader
-from data_reader import BinanceDataReader
+from _common import fetch_and_dump
 
-def get_yesterday_date():
+def get_yesterday_date(now=None):
     """获取昨天的日期字符串"""
-    yesterday = datetime.now() - timedelta(days=1)
+    yesterday = (now or datetime.now()) - timedelta(days=1)
     return yesterday.strftime('%Y-%m-%d')
 
-def download_data_if_needed(downloader, market_type, data_type, symbol, date_str, interval=None):
-    """如果需要的话下载数据"""
+def save_top_records(config, df, output_dir, limit=100, output_format="csv"):
+    """保存单个配置的前N条记录，output_format为"csv"（gzip压缩）或"parquet"（需要安装pyarrow）"""
+    market_type = config["market_type"]
+    data_type = config["data_type"]
+    symbol = config["symbol"]
+    interval = config.get("interval")
     try:
-        print(f"正在检查并下载 {market_type} {symbol} {data_type} {interval or ''} 数据 ({date_str})...")
-        downloader.download_data(
-            market_type=market_type,
-            data_type=data_type,
-            symbol=symbol,
-            start_date=date_str,
-            end_date=date_str,
-            interval=interval
-        )
-        print(f"✓ {market_type} {symbol} {data_type} {interval or ''} 数据下载完成")
-        return True
-    except Exception as e:
-        print(f"✗ {market_type} {symbol} {data_type} {interval or ''} 数据下载失败: {e}")
-        return False
-
-def read_and_save_data(reader, market_type, data_type, symbol, date_str, output_dir, interval=None, limit=100):
-    """读取数据并保存前N条记录到CSV"""
-    try:
-        print(f"正在读取 {market_type} {symbol} {data_type} {interval or ''} 数据...")
-        
-        # 读取数据
-        df = reader.read_data(
-            market_type=market_type,
-            data_type=data_type,
-            symbol=symbol,
-            start_date=date_str,
-            end_date=date_str,
-            interval=interval
-        )
-        
         if df is None or df.empty:
             print(f"✗ 没有找到 {market_type} {symbol} {data_type} {interval or ''} 数据")
             return False
@@ -62,43 +38,60 @@ def read_and_save_data(reader, market_type, data_type, symbol, date_str, output_
         
         # 生成文件名
         interval_suffix = f"_{interval}" if interval else ""
-        filename = f"{symbol.lower()}_{market_type}_{data_type}{interval_suffix}_top{limit}.csv"
+        extension = "parquet" if output_format == "parquet" else "csv.gz"
+        filename = f"{symbol.lower()}_{market_type}_{data_type}{interval_suffix}_top{limit}.{extension}"
         filepath = os.path.join(output_dir, filename)
         
-        # 保存到CSV
-        top_records.to_csv(filepath, index=False)
+        # 保存文件：Parquet保留列类型且写入更快，CSV无需额外依赖
+        if output_format == "parquet":
+            top_records.to_parquet(filepath, index=False, compression="zstd")
+        else:
+            top_records.to_csv(filepath, index=False, compression="gzip")
         
-        print(f"✓ 已保存 {len(top_records)} 条记录到 {filename}")
-        print(f"  数据预览 (前3行):")
-        print(top_records.head(3).to_string(index=False))
-        print(f"  数据预览 (后3行):")
-        print(top_records.tail(3).to_string(index=False))
-        print()
+        # 各配置并发执行，预览一次性输出，避免不同配置的内容交错
+        print(
+            f"✓ 已保存 {len(top_records)} 条记录到 {filename}\n"
+            f"  数据预览 (前3行):\n{top_records.head(3).to_string(index=False)}\n"
+            f"  数据预览 (后3行):\n{top_records.tail(3).to_string(index=False)}\n"
+        )
         
         return True
         
     except Exception as e:
-        print(f"✗ 读取 {market_type} {symbol} {data_type} {interval or ''} 数据失败: {e}")
+        print(f"✗ 保存 {market_type} {symbol} {data_type} {interval or ''} 数据失败: {e}")
         return False
 
-def main():
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="获取上一天ETHUSDT和ETHUSD各种数据类型的前100条记录")
+    parser.add_argument("--format", dest="output_format", choices=["csv", "parquet"], default="csv",
+                        help="输出格式 (默认: csv，parquet需要安装pyarrow)")
+    args = parser.parse_args(argv)
+    
+    # Parquet由pandas委托给pyarrow写入，未安装时提前报错，而不是每个配置各失败一次
+    if args.output_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        parser.error("输出Parquet格式需要安装pyarrow: pip install pyarrow")
+    
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     print("=== 获取上一天ETHUSDT和ETHUSD数据 ===")
-    print(f"当前时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    now = datetime.now()
+    print(f"当前时间: {now.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 获取昨天日期
-    yesterday = get_yesterday_date()
+    yesterday = get_yesterday_date(now)
     print(f"目标日期: {yesterday}")
     
     # 创建输出目录
     output_dir = "/Users/pm/work_ai/binance_trading_system/data/yesterday_top100_data"
     os.makedirs(output_dir, exist_ok=True)
     print(f"输出目录: {output_dir}")
+    print(f"输出格式: {args.output_format}")
     print()
     
-    # 初始化下载器和读取器
-    downloader = BinanceDataDownloader()
-    reader = BinanceDataReader()
-    
     # 定义数据配置
     data_configs = [
         # ETHUSDT spot数据
@@ -117,42 +110,21 @@ def main():
         {"market_type": "cm", "symbol": "ETHUSD_PERP", "data_type": "trades"},
     ]
     
+    # 并发下载、读取并保存所有配置的数据（只读取前100条，读够即停止解析）
+    writer = functools.partial(save_top_records, output_dir=output_dir, limit=100,
+                               output_format=args.output_format)
+    results = asyncio.run(fetch_and_dump(data_configs, yesterday, writer, nrows=100))
+    
     successful_downloads = 0
     successful_reads = 0
-    
-    # 处理每个数据配置
-    for i, config in enumerate(data_configs, 1):
-        print(f"[{i}/{len(data_configs)}] 处理配置: {config}")
-        
-        # 下载数据
-        download_success = download_data_if_needed(
-            downloader=downloader,
-            market_type=config["market_type"],
-            data_type=config["data_type"],
-            symbol=config["symbol"],
-            date_str=yesterday,
-            interval=config.get("interval")
-        )
-        
-        if download_success:
-            successful_downloads += 1
-        
-        # 读取并保存数据
-        read_success = read_and_save_data(
-            reader=reader,
-            market_type=config["market_type"],
-            data_type=config["data_type"],
-            symbol=config["symbol"],
-            date_str=yesterday,
-            output_dir=output_dir,
-            interval=config.get("interval"),
-            limit=100
-        )
-        
-        if read_success:
-            successful_reads += 1
-        
-        print("-" * 80)
+    for config, result in zip(data_configs, results):
+        if isinstance(result, Exception):
+            print(f"✗ 处理配置失败 {config}: {result}")
+            continue
+        # 下载失败（如数据尚未发布）时download_data返回空列表，不抛出异常
+        files, saved = result
+        successful_downloads += bool(files)
+        successful_reads += saved is True
     
     print(f"\n=== 处理完成 ===")
     print(f"成功下载: {successful_downloads}/{len(data_configs)}")
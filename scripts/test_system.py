@@ -4,6 +4,7 @@ import tempfile
 import shutil
 import unittest
 from unittest.mock import patch, MagicMock
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -101,6 +102,81 @@ class TestBinanceDataSystem(unittest.TestCase):
         self.assertFalse(result)
         self.assertFalse(os.path.exists(test_file))
     
+    def test_is_downloaded(self):
+        """测试本地文件是否视为已下载"""
+        test_file = os.path.join(self.test_dir, "test.zip")
+        self.assertFalse(self.downloader._is_downloaded(test_file))
+        
+        # 损坏的文件需要重新下载
+        with open(test_file, 'wb') as f:
+            f.write(b'not a zip')
+        self.assertFalse(self.downloader._is_downloaded(test_file))
+        
+        self.create_test_zip_file(test_file, "klines")
+        self.assertTrue(self.downloader._is_downloaded(test_file))
+    
+    def test_download_data_concurrent(self):
+        """测试并发下载保持文件顺序并跳过失败的文件"""
+        def fake_download(url, local_path):
+            if local_path.endswith("2024-01-02.zip"):
+                return False
+            self.create_test_zip_file(local_path, "klines")
+            return True
+        
+        with patch.object(self.downloader, '_download_file', side_effect=fake_download):
+            files = self.downloader.download_data(
+                ["BTCUSDT"], "spot", "klines", "1h",
+                start_date="2024-01-01", end_date="2024-01-03"
+            )
+        
+        self.assertEqual(
+            [os.path.basename(f) for f in files],
+            ["BTCUSDT-1h-2024-01-01.zip", "BTCUSDT-1h-2024-01-03.zip"]
+        )
+    
+    def test_download_data_duplicate_symbols(self):
+        """测试重复的交易对只下载一次"""
+        def fake_download(url, local_path):
+            self.create_test_zip_file(local_path, "klines")
+            return True
+        
+        with patch.object(self.downloader, '_download_file', side_effect=fake_download) as mock_download:
+            files = self.downloader.download_data(
+                ["BTCUSDT", "BTCUSDT"], "spot", "klines", "1h",
+                start_date="2024-01-01", end_date="2024-01-02"
+            )
+        
+        self.assertEqual(mock_download.call_count, 2)
+        self.assertEqual(
+            [os.path.basename(f) for f in files],
+            ["BTCUSDT-1h-2024-01-01.zip", "BTCUSDT-1h-2024-01-02.zip"]
+        )
+    
+    def test_download_data_monthly(self):
+        """测试月度数据下载到monthly目录"""
+        def fake_download(url, local_path):
+            self.create_test_zip_file(local_path, "klines")
+            return True
+        
+        with patch.object(self.downloader, '_download_file', side_effect=fake_download) as mock_download:
+            files = self.downloader.download_data(
+                ["BTCUSDT"], "spot", "klines", "1h",
+                start_date="2024-01-15", end_date="2024-02-10",
+                download_monthly=True, download_daily=False
+            )
+        
+        expected = [
+            os.path.join(self.test_dir, "spot", "monthly", "klines", "BTCUSDT", "1h",
+                         f"BTCUSDT-1h-{year_month}.zip")
+            for year_month in ("2024-01", "2024-02")
+        ]
+        self.assertEqual(files, expected)
+        # 请求的是月度文件的URL，而不是日度文件
+        urls = [call.args[0] for call in mock_download.call_args_list]
+        self.assertEqual(len(urls), 2)
+        for url, year_month in zip(urls, ("2024-01", "2024-02")):
+            self.assertTrue(url.endswith(f"/spot/monthly/klines/BTCUSDT/1h/BTCUSDT-1h-{year_month}.zip"))
+    
     def test_data_directory_creation(self):
         """测试数据目录创建"""
         # 测试目录是否被创建
@@ -135,6 +211,26 @@ class TestBinanceDataSystem(unittest.TestCase):
         self.assertEqual(stats["total_size_mb"], 0)
         self.assertEqual(stats["total_files"], 0)
         self.assertEqual(stats["data_directory"], self.test_dir)
+        self.assertNotIn("cache", stats)
+    
+    def test_storage_stats_and_cleanup_cache(self):
+        """测试存储统计和清理包括解析缓存"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        manager = HistoricalDataManager(self.test_dir, cache_directory=cache_dir)
+        daily_file = self._create_daily_klines(("01",))[0]
+        manager.reader._read_zip_file(daily_file, "klines", "spot")
+        
+        stats = manager.get_storage_stats()
+        self.assertEqual(stats["cache"]["file_count"], 1)
+        self.assertEqual(stats["total_files"], 2)
+        
+        # 超过保留期限的ZIP文件和缓存文件都被删除
+        old_time = datetime.now().timestamp() - 60 * 24 * 3600
+        cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        for path in (daily_file, cache_file):
+            os.utime(path, (old_time, old_time))
+        self.assertEqual(manager.cleanup_old_data(days_to_keep=30), 2)
+        self.assertEqual(os.listdir(cache_dir), [])
     
     def test_local_symbols_empty(self):
         """测试空本地交易对列表"""
@@ -146,35 +242,100 @@ class TestBinanceDataSystem(unittest.TestCase):
         df = self.reader.read_data("BTCUSDT", "spot", "klines", "1h")
         self.assertTrue(df.empty)
     
-    def create_test_zip_file(self, file_path: str, data_type: str = "klines"):
-        """创建测试用的ZIP文件"""
-        import zipfile
-        import io
+    # 每种数据类型、行数的ZIP文件内容只构建一次，之后直接写入字节
+    _zip_templates = {}
+    
+    @staticmethod
+    def _generate_test_data(data_type: str, n_rows: int) -> pd.DataFrame:
+        """用numpy按列生成测试数据，列顺序与币安现货CSV一致"""
+        rng = np.random.default_rng(0)
+        idx = np.arange(n_rows)
+        quantity = np.round(rng.uniform(0.01, 1.0, n_rows), 4)
+        # 布尔值按币安文件的格式写成小写
+        is_buyer_maker = np.where(idx % 2 == 1, 'true', 'false')
         
-        # 创建测试数据
         if data_type == "klines":
-            test_data = [
-                "1640995200000,50000.00,51000.00,49000.00,50500.00,100.5,1640998799999,5050000.00,1000,50.25,2525000.00,0",
-                "1640998800000,50500.00,51500.00,49500.00,51000.00,120.3,1641002399999,6141500.00,1200,60.15,3070750.00,0"
-            ]
-        elif data_type == "trades":
-            test_data = [
-                "1,50000.00,0.1,5000.00,1640995200000,false,true",
-                "2,50100.00,0.2,10020.00,1640995260000,true,true"
-            ]
-        else:  # aggTrades
-            test_data = [
-                "1,50000.00,0.1,1,1,1640995200000,false,true",
-                "2,50100.00,0.2,2,2,1640995260000,true,true"
-            ]
+            open_time = 1640995200000 + idx * 3600000
+            open_price = 50000.0 + idx * 500.0
+            volume = np.round(rng.uniform(50.0, 150.0, n_rows), 2)
+            return pd.DataFrame({
+                'open_time': open_time,
+                'open': open_price,
+                'high': open_price + 1000.0,
+                'low': open_price - 1000.0,
+                'close': open_price + 500.0,
+                'volume': volume,
+                'close_time': open_time + 3599999,
+                'quote_volume': np.round(volume * (open_price + 500.0), 2),
+                'count': 1000 + idx * 200,
+                'taker_buy_volume': np.round(volume / 2, 2),
+                'taker_buy_quote_volume': np.round(volume * (open_price + 500.0) / 2, 2),
+                'ignore': np.zeros(n_rows, dtype=np.int64),
+            })
+        
+        trade_id = idx + 1
+        price = 50000.0 + idx * 100.0
+        transact_time = 1640995200000 + idx * 60000
+        is_best_match = np.full(n_rows, 'true')
+        if data_type == "trades":
+            return pd.DataFrame({
+                'id': trade_id,
+                'price': price,
+                'qty': quantity,
+                'quote_qty': np.round(price * quantity, 2),
+                'time': transact_time,
+                'is_buyer_maker': is_buyer_maker,
+                'is_best_match': is_best_match,
+            })
         
+        # aggTrades
+        return pd.DataFrame({
+            'agg_trade_id': trade_id,
+            'price': price,
+            'quantity': quantity,
+            'first_trade_id': trade_id,
+            'last_trade_id': trade_id,
+            'transact_time': transact_time,
+            'is_buyer_maker': is_buyer_maker,
+            'is_best_match': is_best_match,
+        })
+    
+    @classmethod
+    def _get_zip_template(cls, data_type: str, n_rows: int = 2) -> bytes:
+        """获取测试ZIP文件的字节内容（按数据类型和行数缓存）"""
+        import zipfile
+        import io
+        
+        key = (data_type, n_rows)
+        if key not in cls._zip_templates:
+            df = cls._generate_test_data(data_type, n_rows)
+            csv_content = df.to_csv(header=False, index=False, lineterminator='\n')
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w') as zf:
+                zf.writestr('data.csv', csv_content)
+            cls._zip_templates[key] = buffer.getvalue()
+        return cls._zip_templates[key]
+    
+    def create_test_zip_file(self, file_path: str, data_type: str = "klines", n_rows: int = 2):
+        """创建测试用的ZIP文件，包含n_rows行数据"""
         # 创建目录
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        # 创建ZIP文件
-        with zipfile.ZipFile(file_path, 'w') as zf:
-            csv_content = '\n'.join(test_data)
-            zf.writestr('data.csv', csv_content)
+        # 写入预先构建好的ZIP内容
+        with open(file_path, 'wb') as f:
+            f.write(self._get_zip_template(data_type, n_rows))
+    
+    def _create_daily_klines(self, days, n_rows: int = 2) -> list:
+        """创建BTCUSDT 1h在2024-01各日的日度K线文件，返回文件路径列表"""
+        files = []
+        for day in days:
+            daily_file = os.path.join(
+                self.test_dir, "spot", "daily", "klines", "BTCUSDT", "1h",
+                f"BTCUSDT-1h-2024-01-{day}.zip"
+            )
+            self.create_test_zip_file(daily_file, "klines", n_rows)
+            files.append(daily_file)
+        return files
     
     def test_read_zip_file(self):
         """测试ZIP文件读取"""
@@ -189,6 +350,174 @@ class TestBinanceDataSystem(unittest.TestCase):
         self.assertEqual(len(df), 2)
         self.assertEqual(len(df.columns), 12)  # K线数据有12列
     
+    def test_read_large_file(self):
+        """测试读取行数较多的文件"""
+        test_file = os.path.join(self.test_dir, "large.zip")
+        self.create_test_zip_file(test_file, "aggTrades", n_rows=10000)
+        
+        df = self.reader._read_zip_file(test_file, "aggTrades", "spot")
+        self.assertEqual(len(df), 10000)
+        self.assertTrue(df['agg_trade_id'].is_monotonic_increasing)
+        
+        chunks = list(self.reader._iter_zip_file(test_file, "aggTrades", "spot", 3000))
+        self.assertEqual([len(chunk) for chunk in chunks], [3000, 3000, 3000, 1000])
+    
+    def test_read_data_nrows(self):
+        """测试限制读取行数"""
+        # 创建三天的日度文件，每个文件2行
+        self._create_daily_klines(("01", "02", "03"))
+        
+        df = self.reader.read_data(
+            "BTCUSDT", "spot", "klines", "1h",
+            start_date="2024-01-01", end_date="2024-01-03", nrows=3
+        )
+        self.assertEqual(len(df), 3)
+        
+        # 不限制时读取全部数据
+        df = self.reader.read_data(
+            "BTCUSDT", "spot", "klines", "1h",
+            start_date="2024-01-01", end_date="2024-01-03"
+        )
+        self.assertEqual(len(df), 6)
+
+    def test_read_data_chunks(self):
+        """测试分块读取数据"""
+        self._create_daily_klines(("01", "02", "03"))
+        
+        chunks = list(self.reader.read_data(
+            "BTCUSDT", "spot", "klines", "1h",
+            start_date="2024-01-01", end_date="2024-01-03", chunk_size=4
+        ))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        self.assertEqual(list(chunks[0].columns), self.reader.kline_columns)
+        
+        # 同时指定nrows时总行数不超过nrows
+        chunks = list(self.reader.read_data(
+            "BTCUSDT", "spot", "klines", "1h",
+            start_date="2024-01-01", end_date="2024-01-03", chunk_size=4, nrows=3
+        ))
+        self.assertEqual([len(chunk) for chunk in chunks], [3])
+    
+    def test_read_data_chunks_nrows(self):
+        """测试分块读取在读够nrows行后停止"""
+        self._create_daily_klines(("01", "02", "03"), n_rows=5)
+        
+        chunks = list(self.reader.read_data(
+            "BTCUSDT", "spot", "klines", "1h",
+            start_date="2024-01-01", end_date="2024-01-03", chunk_size=4, nrows=9
+        ))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 1])
+        self.assertEqual(list(pd.concat(chunks).index), list(range(4)) * 2 + [0])
+    
+    def test_read_data_columns(self):
+        """测试只读取指定列"""
+        daily_file = os.path.join(
+            self.test_dir, "spot", "daily", "aggTrades", "BTCUSDT",
+            "BTCUSDT-aggTrades-2024-01-01.zip"
+        )
+        self.create_test_zip_file(daily_file, "aggTrades")
+        
+        columns = ['agg_trade_id', 'price', 'quantity', 'transact_time', 'is_buyer_maker']
+        df = self.reader.read_data(
+            "BTCUSDT", "spot", "aggTrades",
+            start_date="2024-01-01", end_date="2024-01-01", columns=columns
+        )
+        self.assertEqual(len(df), 2)
+        self.assertEqual(list(df.columns), columns)
+        
+        # 按预定义类型解析
+        self.assertEqual(df['agg_trade_id'].dtype, 'int64')
+        self.assertEqual(df['price'].dtype, 'float64')
+        self.assertEqual(df['is_buyer_maker'].dtype, 'bool')
+        
+        # trades 使用读取器的列名
+        trades_file = os.path.join(
+            self.test_dir, "spot", "daily", "trades", "BTCUSDT",
+            "BTCUSDT-trades-2024-01-01.zip"
+        )
+        self.create_test_zip_file(trades_file, "trades")
+        
+        df = self.reader.read_data(
+            "BTCUSDT", "spot", "trades",
+            start_date="2024-01-01", end_date="2024-01-01", columns=['id', 'qty', 'quote_qty']
+        )
+        self.assertEqual(list(df.columns), ['id', 'qty', 'quote_qty'])
+        self.assertEqual(list(df['id']), [1, 2])
+    
+    def test_read_monthly(self):
+        """测试直接读取月度文件"""
+        monthly_file = os.path.join(
+            self.test_dir, "spot", "monthly", "klines", "BTCUSDT", "1h",
+            "BTCUSDT-1h-2024-01.zip"
+        )
+        self.create_test_zip_file(monthly_file, "klines")
+        
+        df = self.reader.read_monthly("BTCUSDT", "2024-01", "spot", "klines", "1h", nrows=1)
+        self.assertEqual(len(df), 1)
+        
+        # 月度文件不存在时返回空DataFrame
+        df = self.reader.read_monthly("BTCUSDT", "2024-02", "spot", "klines", "1h")
+        self.assertTrue(df.empty)
+        
+        # 月份格式无效时报错
+        for year_month in ("2024-1", "2024-13", "2024-01-01", None):
+            with self.assertRaises(ValueError):
+                self.reader.read_monthly("BTCUSDT", year_month, "spot", "klines", "1h")
+    
+    def test_read_files(self):
+        """测试直接读取给定的文件列表"""
+        files = self._create_daily_klines(("01", "02"))
+        
+        df = self.manager.read_files(files, "spot", "klines")
+        self.assertEqual(len(df), 4)
+        
+        df = self.manager.read_files(files, "spot", "klines", nrows=3)
+        self.assertEqual(len(df), 3)
+        
+        self.assertTrue(self.manager.read_files([], "spot", "klines").empty)
+        
+        # 读取器与管理器的参数顺序一致：market_type在data_type之前
+        df = self.reader.read_files(files, "spot", "klines", nrows=3)
+        self.assertEqual(list(df.columns), self.reader.kline_columns)
+    
+    def test_read_with_cache(self):
+        """测试解析结果的磁盘缓存"""
+        cache_dir = os.path.join(self.test_dir, "cache")
+        reader = BinanceDataReader(self.test_dir, cache_directory=cache_dir)
+        test_file = os.path.join(self.test_dir, "test.zip")
+        self.create_test_zip_file(test_file, "klines")
+        
+        df = reader._read_zip_file(test_file, "klines", "spot")
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        
+        # 第二次读取命中缓存，结果与直接解析一致
+        with patch.object(reader, '_parse_zip_file') as mock_parse:
+            cached = reader._read_zip_file(test_file, "klines", "spot")
+            mock_parse.assert_not_called()
+        pd.testing.assert_frame_equal(df, cached)
+        
+        # 无法加载的缓存文件当作未命中，重新解析
+        cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        with open(cache_file, 'wb') as f:
+            f.write(b'not a pickle')
+        pd.testing.assert_frame_equal(df, reader._read_zip_file(test_file, "klines", "spot"))
+    
+    def test_read_latest(self):
+        """测试读取最新N条数据"""
+        self._create_daily_klines(("01", "02", "03"))
+        
+        df = self.reader.read_latest("BTCUSDT", "spot", "klines", "1h", n=3, end_date="2024-01-03")
+        self.assertEqual(len(df), 3)
+        self.assertEqual(list(df.index), [0, 1, 2])
+        
+        df = self.reader.read_latest("BTCUSDT", "spot", "klines", "1h", n=3, end_date="2024-01-03",
+                                     columns=['open_time', 'close'])
+        self.assertEqual(list(df.columns), ['open_time', 'close'])
+        
+        # 结束日期之后的文件不应被读取
+        df = self.reader.read_latest("BTCUSDT", "spot", "klines", "1h", n=10, end_date="2024-01-01")
+        self.assertEqual(len(df), 2)
+    
     def test_data_processing(self):
         """测试数据处理"""
         # 创建测试数据